@@ -1,39 +1,117 @@
 #!/usr/bin/env python3
 """
 子域名扫描工具
-支持多线程扫描、多种发现方式
+支持异步并发扫描、多种发现方式
 """
 
 import argparse
-import threading
+import asyncio
 import queue
 import time
 import sys
 import os
 from urllib.parse import urlparse
 import socket
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import dns.resolver
+import aiodns
+import pycares.errno
+import aiohttp
+from aiohttp.abc import AbstractResolver
+try:
+    # 可选: 仅在 --resolver dnspython 时使用的纯Python解析器
+    import dns.asyncresolver
+except ImportError:
+    dns = None
 import json
+import re
+import uuid
 import csv
 from datetime import datetime
 
+# 常见子域名 (模块加载时构建一次, 已去重)
+_COMMON_SUBS = frozenset({
+    'www', 'mail', 'ftp', 'localhost', 'webmail', 'smtp', 'pop', 'ns1', 'webdisk',
+    'ns2', 'cpanel', 'whm', 'autodiscover', 'autoconfig', 'ns', 'test', 'admin', 'blog',
+    'dev', 'api', 'secure', 'vpn', 'mobile', 'shop', 'app', 'cdn', 'm', 'email',
+    'portal', 'support', 'forum', 'news', 'media', 'static', 'docs', 'store', 'db',
+    'sql', 'backup', 'old', 'new', 'beta', 'staging', 'mail2', 'live', 'search',
+    'images', 'img', 'download', 'uploads', 'video', 'music', 'demo', 'help', 'kb',
+    'wiki', 'status', 'monitor', 'payment', 'billing', 'invoice', 'ssl', 'cloud',
+    'server', 'serv', 'service', 'services', 'apps', 'office', 'remote', 'share',
+    'shared', 'sharepoint', 'file', 'files', 'doc', 'document', 'map', 'yiyan', 'chat',
+    'baijiahao', 'ti', 'zhidao'
+})
+
+# 合法主机名: 由字母、数字、连字符组成的标签, 以点分隔
+_HOSTNAME_RE = re.compile(r'(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?')
+
+# 默认的上游DNS服务器, 每台单独一个解析器以分摊各自的限速
+DEFAULT_NAMESERVERS = ['1.1.1.1', '8.8.8.8', '9.9.9.9', '208.67.222.222']
+
+class SeededResolver(AbstractResolver):
+    """aiohttp 解析器: 优先返回扫描中已解析到的IP, 其余域名交给 aiodns"""
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        # host -> [ips, 引用计数], 同一域名可能被多个探测同时使用
+        self._seeded = {}
+
+    def seed(self, host, ips):
+        entry = self._seeded.get(host)
+        if entry is None:
+            self._seeded[host] = [ips, 1]
+        else:
+            entry[0] = ips
+            entry[1] += 1
+
+    def forget(self, host):
+        entry = self._seeded.get(host)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._seeded[host]
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        entry = self._seeded.get(host)
+        if entry is None:
+            return await self._fallback.resolve(host, port, family)
+        ips = entry[0]
+        return [
+            {'hostname': host, 'host': ip, 'port': port, 'family': socket.AF_INET,
+             'proto': 0, 'flags': socket.AI_NUMERICHOST}
+            for ip in ips
+        ]
+
+    async def close(self):
+        await self._fallback.close()
+
 class SubdomainScanner:
-    def __init__(self, domain, threads=50, timeout=5, output=None):
+    def __init__(self, domain, threads=50, timeout=5, output=None, nameservers=None,
+                 resolver='aiodns'):
         self.domain = domain.lower().strip()
+        # 工作协程数为 threads * 20, 少于1个时扫描会卡住或什么都不检查
+        if threads < 1:
+            raise ValueError(f"threads 必须为正整数: {threads}")
         self.threads = threads
         self.timeout = timeout
         self.output = output
+        self.nameservers = nameservers or DEFAULT_NAMESERVERS
+        # 'aiodns' (默认, c-ares 在C中解析应答) 或 'dnspython' (备用)
+        self.resolver_backend = resolver
         self.found_subdomains = set()
-        self.lock = threading.Lock()
+        self._results_q = None
         self.checked_count = 0
         self.start_time = time.time()
         
-        # 设置DNS解析器
-        self.resolver = dns.resolver.Resolver()
-        self.resolver.timeout = timeout
-        self.resolver.lifetime = timeout
+        # 异步DNS解析器 (每个上游一个), 需在事件循环内创建 (见 _scan_async)
+        self.aresolvers = []
+        self.dns_resolver = None
+        self.http_resolver = None
+        self.session = None
+        # 泛解析IP, 由 _detect_wildcard 填充
+        self.wildcard_ips = set()
+        # 证书透明度日志中出现过的完整域名, 由 _prefetch_ct 填充
+        self.ct_domains = set()
         
         # 输出文件设置
         self.output_handlers = []
@@ -46,143 +124,313 @@ class SubdomainScanner:
                 self.output_handlers.append(TextOutput(output))
 
     def load_subdomains_from_file(self, wordlist_file):
-        """从文件加载子域名字典"""
-        subdomains = set()
+        """从文件逐行读取子域名字典 (生成器, 不整体载入内存)"""
         try:
             with open(wordlist_file, 'r', encoding='utf-8', errors='ignore') as f:
                 for line in f:
                     subdomain = line.strip()
                     if subdomain and not subdomain.startswith('#'):
-                        subdomains.add(subdomain)
-            print(f"[+] 已加载 {len(subdomains)} 个子域名")
-            return list(subdomains)
-        except FileNotFoundError:
-            print(f"[-] 错误: 文件 {wordlist_file} 不存在")
-            return []
+                        yield sys.intern(subdomain)
         except Exception as e:
             print(f"[-] 读取文件错误: {e}")
-            return []
 
-    def dns_scan(self, subdomain):
-        """DNS解析扫描"""
-        full_domain = f"{subdomain}.{self.domain}"
+    async def _resolve(self, full_domain):
+        """解析IPv4地址 (aiodns 路径先查hosts文件再查DNS, dnspython 路径只查DNS)
+        
+        确认不存在 (NXDOMAIN/无A记录) 返回空列表, 超时、SERVFAIL 等无法确定的失败返回 None
+        """
         try:
-            answers = self.resolver.resolve(full_domain, 'A')
-            ips = [str(rdata) for rdata in answers]
-            return full_domain, ips, "DNS"
-        except:
+            if self.dns_resolver is not None:
+                answers = await self.dns_resolver.resolve(full_domain, 'A', search=False)
+                return [str(rdata) for rdata in answers]
+            # 按域名哈希固定到某个上游, 查询均匀分散到各服务器
+            resolver = self.aresolvers[hash(full_domain) % len(self.aresolvers)]
+            host = await resolver.gethostbyname(full_domain, socket.AF_INET)
+            return host.addresses
+        except aiodns.error.DNSError as e:
+            if e.args and e.args[0] in (pycares.errno.ARES_ENOTFOUND, pycares.errno.ARES_ENODATA):
+                return []
+            return None
+        except Exception as e:
+            # 不能用裸 except, 否则会吞掉 CancelledError 导致扫描无法中断
+            if dns is not None and isinstance(e, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+                return []
             return None
 
-    def http_scan(self, subdomain):
-        """HTTP请求扫描"""
-        full_domain = f"{subdomain}.{self.domain}"
-        for protocol in ['https', 'http']:
-            url = f"{protocol}://{full_domain}"
-            try:
-                response = requests.get(
-                    url, 
-                    timeout=self.timeout, 
-                    verify=False,
-                    allow_redirects=True
-                )
-                if response.status_code < 400:
-                    return full_domain, [url], "HTTP"
-            except:
+    async def _detect_wildcard(self):
+        """用随机子域名探测泛解析"""
+        probes = await asyncio.gather(*[
+            self._resolve(f"nonexistent-{uuid.uuid4().hex}.{self.domain}")
+            for _ in range(3)
+        ])
+        resolved = [frozenset(ips) for ips in probes if ips]
+        for ips in set(resolved):
+            if resolved.count(ips) >= 2:
+                self.wildcard_ips = set(ips)
+                self._log(f"[!] 检测到泛解析: {', '.join(sorted(ips))}")
+                break
+
+    async def dns_scan_async(self, full_domain, resolved_ips=None):
+        """DNS解析扫描 (aiodns/c-ares), 可传入已解析的IP"""
+        if resolved_ips is None:
+            resolved_ips = await self._resolve(full_domain)
+        # 过滤泛解析IP, 只剩泛解析结果视为未发现
+        ips = [ip for ip in resolved_ips if ip not in self.wildcard_ips]
+        if not ips:
+            return None
+        return full_domain, ips, "DNS"
+
+    async def http_scan(self, full_domain, resolved_ips=None):
+        """HTTP请求扫描, 有已解析的IP时交给连接器的解析器复用, 不再重复解析"""
+        # URL 仍使用域名, 连接池按域名区分, 不会把不同虚拟主机的请求发到同一条TLS连接
+        seeded = bool(resolved_ips)
+        if seeded:
+            self.http_resolver.seed(full_domain, resolved_ips)
+        try:
+            for url in ("https://" + full_domain, "http://" + full_domain):
+                try:
+                    # 只需要状态码, HEAD 即可, 也不跟随跳转
+                    async with self.session.head(
+                        url,
+                        allow_redirects=False
+                    ) as response:
+                        if response.status < 400:
+                            return full_domain, [url], "HTTP"
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    continue
+            return None
+        finally:
+            # 只撤销本次调用加入的种子, 不影响同一域名的其他探测
+            if seeded:
+                self.http_resolver.forget(full_domain)
+
+    async def _prefetch_ct(self):
+        """一次性查询 crt.sh, 收集证书中出现过的子域名"""
+        url = f"https://crt.sh/?q=%25.{self.domain}&output=json"
+        try:
+            # crt.sh 响应较慢, 单独放宽超时
+            async with self.session.get(
+                url,
+                timeout=aiohttp.ClientTimeout(total=max(self.timeout, 60))
+            ) as response:
+                if response.status != 200:
+                    self._log(f"[-] 证书透明度查询失败: HTTP {response.status}")
+                    return
+                entries = await response.json(content_type=None)
+        except Exception as e:
+            self._log(f"[-] 证书透明度查询失败: {e}")
+            return
+        if not isinstance(entries, list):
+            self._log("[-] 证书透明度查询失败: 响应格式异常")
+            return
+        
+        suffix = "." + self.domain
+        for entry in entries:
+            if not isinstance(entry, dict):
                 continue
-        return None
+            name_value = entry.get('name_value') or ''
+            if not isinstance(name_value, str):
+                continue
+            for name in name_value.split('\n'):
+                name = name.strip().lower()
+                if name.startswith('*.'):
+                    name = name[2:]
+                # 证书身份里还有邮箱等非主机名内容, 只保留合法主机名
+                if name.endswith(suffix) and _HOSTNAME_RE.fullmatch(name):
+                    self.ct_domains.add(name)
+        self._log(f"[+] 证书透明度日志中发现 {len(self.ct_domains)} 个候选子域名")
+
+    def _with_ct_candidates(self, subdomains):
+        """在字典之后追加证书中发现、但字典里没有的子域名"""
+        suffix_len = len(self.domain) + 1
+        pending = {sys.intern(name[:-suffix_len]) for name in self.ct_domains}
+        for subdomain in subdomains:
+            pending.discard(subdomain)
+            yield subdomain
+        yield from pending
 
-    def certificate_scan(self, subdomain):
-        """证书透明度扫描（简化版）"""
-        # 这里可以实现证书透明度查询
-        # 由于需要第三方API，这里留作扩展
+    def certificate_scan(self, full_domain):
+        """证书透明度扫描 (基于 _prefetch_ct 的结果)"""
+        if full_domain in self.ct_domains:
+            return full_domain, [], "CERT"
         return None
 
-    def check_subdomain(self, subdomain, methods=['dns', 'http']):
+    async def check_subdomain(self, subdomain, methods=['dns', 'http']):
         """检查单个子域名"""
         result = None
+        # 完整域名只拼接一次, 各扫描方法共用
+        full_domain = f"{subdomain}.{self.domain}"
+        
+        # DNS 解析到的IP (含泛解析IP) 交给后续方法复用
+        resolved_ips = None
         
         for method in methods:
             if method == 'dns':
-                result = self.dns_scan(subdomain)
+                resolved_ips = await self._resolve(full_domain)
+                result = await self.dns_scan_async(full_domain, resolved_ips or [])
             elif method == 'http':
-                result = self.http_scan(subdomain)
+                result = await self.http_scan(full_domain, resolved_ips)
             elif method == 'cert':
-                result = self.certificate_scan(subdomain)
+                result = self.certificate_scan(full_domain)
             
             if result:
                 break
+            # NXDOMAIN/无A记录是权威结果 (有无泛解析都一样), 无需再做HTTP探测;
+            # 超时/SERVFAIL 等不确定的失败仍继续后续方法
+            if method == 'dns' and resolved_ips == []:
+                break
         
-        with self.lock:
-            self.checked_count += 1
-            if result:
-                domain, ips, method = result
-                self.found_subdomains.add(domain)
-                status_msg = f"[+] 发现: {domain} (方法: {method})"
-                print(status_msg)
-                
-                # 写入输出文件
-                for handler in self.output_handlers:
-                    handler.write(domain, ips, method)
-                
-                return domain
-            
-            # 进度显示
-            if self.checked_count % 100 == 0:
-                elapsed = time.time() - self.start_time
-                print(f"[*] 已检查 {self.checked_count} 个子域名, 发现 {len(self.found_subdomains)} 个, 耗时: {elapsed:.2f}s")
+        # 结果交给唯一的写入任务处理, 无需加锁
+        await self._results_q.put(('result', subdomain, result))
+        return result[0] if result else None
+
+    def _log(self, msg):
+        """把日志交给写入任务输出, 避免在工作协程里阻塞于控制台"""
+        self._results_q.put_nowait(('log', msg))
+
+    async def _writer(self):
+        """唯一的消费者: 维护计数、打印日志并写入输出文件"""
+        while True:
+            # 取出队列中已有的全部结果, 整批共用一个时间戳
+            batch = [await self._results_q.get()]
+            while not self._results_q.empty():
+                batch.append(self._results_q.get_nowait())
+            ts = datetime.now().isoformat()
+            for item in batch:
+                if item is None:
+                    return
+                if item[0] == 'log':
+                    print(item[1])
+                else:
+                    self._handle_result(item[1], item[2], ts)
+
+    def _handle_result(self, subdomain, result, ts):
+        """处理单条检查结果"""
+        self.checked_count += 1
+        if result:
+            domain, ips, method = result
+            # 字典按流读取不再预先去重, 重复命中只记录一次
+            if domain in self.found_subdomains:
+                return
+            self.found_subdomains.add(domain)
+            status_msg = f"[+] 发现: {domain} (方法: {method})"
+            print(status_msg)
             
-            return None
+            # 写入输出文件
+            for handler in self.output_handlers:
+                handler.write(domain, ips, method, ts)
+            return
+        
+        # 进度显示
+        if self.checked_count % 100 == 0:
+            elapsed = time.time() - self.start_time
+            print(f"[*] 已检查 {self.checked_count} 个子域名, 发现 {len(self.found_subdomains)} 个, 耗时: {elapsed:.2f}s")
 
     def scan_with_wordlist(self, wordlist_file, methods=['dns', 'http']):
         """使用字典文件进行扫描"""
-        subdomains = self.load_subdomains_from_file(wordlist_file)
-        if not subdomains:
+        if not os.path.isfile(wordlist_file):
+            print(f"[-] 错误: 文件 {wordlist_file} 不存在")
             return
         
-        print(f"[*] 开始扫描 {self.domain}, 使用 {len(subdomains)} 个子域名")
-        print(f"[*] 线程数: {self.threads}, 超时: {self.timeout}s")
+        print(f"[*] 开始扫描 {self.domain}, 使用字典 {wordlist_file}")
+        print(f"[*] 并发数: {self.threads * 20}, 超时: {self.timeout}s")
         
-        with ThreadPoolExecutor(max_workers=self.threads) as executor:
-            futures = {
-                executor.submit(self.check_subdomain, subdomain, methods): subdomain 
-                for subdomain in subdomains
-            }
-            
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    continue
+        asyncio.run(self._scan_async(self.load_subdomains_from_file(wordlist_file), methods))
 
     def common_scan(self, methods=['dns', 'http']):
         """常见子域名扫描"""
-        common_subdomains = [
-            'www', 'mail', 'ftp', 'localhost', 'webmail', 'smtp', 'pop', 'ns1', 'webdisk',
-            'ns2', 'cpanel', 'whm', 'autodiscover', 'autoconfig', 'ns', 'test', 'admin',
-            'blog', 'dev', 'api', 'secure', 'vpn', 'mobile', 'shop', 'app', 'cdn', 'm',
-            'email', 'portal', 'support', 'forum', 'news', 'media', 'static', 'docs',
-            'store', 'shop', 'db', 'sql', 'backup', 'old', 'new', 'beta', 'staging',
-            'mail2', 'test', 'live', 'search', 'images', 'img', 'download', 'uploads',
-            'video', 'music', 'demo', 'help', 'kb', 'wiki', 'status', 'monitor',
-            'payment', 'billing', 'invoice', 'secure', 'ssl', 'cdn', 'cloud', 'server',
-            'serv', 'service', 'services', 'app', 'apps', 'office', 'remote', 'share',
-            'shared', 'sharepoint', 'ftp', 'file', 'files', 'doc', 'docs', 'document',
-            'map','yiyan','chat','baijiahao','ti','zhidao'
-        ]
+        print(f"[*] 开始常见子域名扫描，共 {len(_COMMON_SUBS)} 个")
         
-        print(f"[*] 开始常见子域名扫描，共 {len(common_subdomains)} 个")
-        
-        with ThreadPoolExecutor(max_workers=self.threads) as executor:
-            futures = {
-                executor.submit(self.check_subdomain, subdomain, methods): subdomain 
-                for subdomain in common_subdomains
-            }
-            
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    continue
+        asyncio.run(self._scan_async(_COMMON_SUBS, methods))
+
+    def _make_dnspython_resolver(self):
+        """创建备用的 dnspython 解析器, 行为与 c-ares 配置一致"""
+        resolver = dns.asyncresolver.Resolver(configure=False)
+        resolver.nameservers = list(self.nameservers)
+        resolver.timeout = self.timeout
+        resolver.lifetime = self.timeout
+        resolver.search = []
+        resolver.retry_servfail = False
+        return resolver
+
+    async def _producer(self, subdomains, work_q, workers):
+        """把子域名逐个去重后放入有界队列, 队列满时等待消费"""
+        # 只保存已出现过的(驻留)子域名, 不保存文件内容; 每个子域名只检查、计数一次
+        seen = set()
+        for subdomain in subdomains:
+            if subdomain in seen:
+                continue
+            seen.add(subdomain)
+            await work_q.put(subdomain)
+        for _ in range(workers):
+            await work_q.put(None)
+
+    async def _worker(self, work_q, methods):
+        """从队列取子域名并检查, 直到收到结束标记"""
+        while True:
+            subdomain = await work_q.get()
+            if subdomain is None:
+                return
+            try:
+                await self.check_subdomain(subdomain, methods)
+            except Exception:
+                await self._results_q.put(('result', subdomain, None))
+
+    async def _scan_async(self, subdomains, methods):
+        """在单个事件循环中并发扫描所有子域名 (subdomains 可以是任意可迭代对象)"""
+        self._results_q = asyncio.Queue()
+        writer = asyncio.create_task(self._writer())
+        # 每个查询只发一次, 不追加search域, SERVFAIL/REFUSED 直接视为失败而不换服务器重试
+        resolver_opts = dict(
+            timeout=self.timeout,
+            tries=1,
+            flags=pycares.ARES_FLAG_NOSEARCH | pycares.ARES_FLAG_NOCHECKRESP
+        )
+        if self.resolver_backend == 'dnspython':
+            self.dns_resolver = self._make_dnspython_resolver()
+        else:
+            self.aresolvers = [
+                aiodns.DNSResolver(nameservers=[ns], **resolver_opts)
+                for ns in self.nameservers
+            ]
+        self.http_resolver = SeededResolver(
+            aiohttp.AsyncResolver(nameservers=self.nameservers, **resolver_opts)
+        )
+        # 整个扫描共用一个会话, 复用连接池和DNS缓存
+        # 不校验证书, 所有HTTPS连接共用同一个SSL上下文; 空闲连接保留到扫描后段继续复用
+        connector = aiohttp.TCPConnector(
+            limit=1000,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+            ssl=False,
+            resolver=self.http_resolver
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        # 工作协程数即同时在途的检查上限, 内存占用与字典大小无关
+        workers = self.threads * 20
+        work_q = asyncio.Queue(maxsize=10_000)
+        try:
+            if 'dns' in methods:
+                await self._detect_wildcard()
+            if 'cert' in methods:
+                # 一次批量查询代替逐个子域名查询, 候选名仍按 methods 逐个确认
+                await self._prefetch_ct()
+                subdomains = self._with_ct_candidates(subdomains)
+            await asyncio.gather(
+                self._producer(subdomains, work_q, workers),
+                *[self._worker(work_q, methods) for _ in range(workers)]
+            )
+        finally:
+            await self._results_q.put(None)
+            await writer
+            await self.session.close()
+            # 自带的解析器不随连接器关闭, 需单独关闭
+            await self.http_resolver.close()
+            for resolver in self.aresolvers:
+                await resolver.close()
 
     def generate_report(self):
         """生成扫描报告"""
@@ -203,59 +451,84 @@ class SubdomainScanner:
 
 # 输出处理类
 class OutputHandler:
+    # 缓冲的记录条数, 满后一次性写入
+    _BUF = 256
+
     def __init__(self, filename):
         self.filename = filename
-        self.file = open(filename, 'w', encoding='utf-8')
+        # 先写临时文件, 关闭时再原子替换为目标文件
+        self.tmp_filename = filename + '.tmp'
+        self.file = open(self.tmp_filename, 'w', encoding='utf-8', buffering=1 << 20)
+        self._buf = []
         self.write_header()
     
+    def _append(self, text):
+        self._buf.append(text)
+        if len(self._buf) >= self._BUF:
+            self._flush()
+    
+    def _flush(self):
+        if self._buf:
+            self.file.write(''.join(self._buf))
+            self._buf.clear()
+    
     def write_header(self):
         pass
     
-    def write(self, domain, ips, method):
+    def write(self, domain, ips, method, ts):
         pass
     
     def close(self):
+        self._flush()
         self.file.close()
+        os.replace(self.tmp_filename, self.filename)
 
 class TextOutput(OutputHandler):
     def write_header(self):
-        self.file.write(f"# 子域名扫描报告\n")
-        self.file.write(f"# 目标域名: \n")
-        self.file.write(f"# 扫描时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        self.file.write(f"# \n")
+        self._append(f"# 子域名扫描报告\n")
+        self._append(f"# 目标域名: \n")
+        self._append(f"# 扫描时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self._append(f"# \n")
     
-    def write(self, domain, ips, method):
-        self.file.write(f"{domain}\n")
+    def write(self, domain, ips, method, ts):
+        self._append(f"{domain}\n")
 
 class JSONOutput(OutputHandler):
     def write_header(self):
-        self.file.write('{"scan_info": {"start_time": "' + 
-                       datetime.now().isoformat() + 
-                       '", "subdomains": [')
+        self._append('{"scan_info": {"start_time": "' + 
+                     datetime.now().isoformat() + 
+                     '", "subdomains": [')
         self.first_entry = True
     
-    def write(self, domain, ips, method):
-        if not self.first_entry:
-            self.file.write(',')
-        self.file.write(json.dumps({
+    def write(self, domain, ips, method, ts):
+        # 分隔符与记录合并为一条缓冲
+        sep = '' if self.first_entry else ','
+        self._append(sep + json.dumps({
             'domain': domain,
             'ips': ips,
             'method': method,
-            'discovery_time': datetime.now().isoformat()
+            'discovery_time': ts
         }))
         self.first_entry = False
     
     def close(self):
-        self.file.write(']}')
+        self._append(']}')
         super().close()
 
 class CSVOutput(OutputHandler):
     def write_header(self):
-        self.file.write("domain,ips,method,discovery_time\n")
+        self._append("domain,ips,method,discovery_time\n")
     
-    def write(self, domain, ips, method):
+    def write(self, domain, ips, method, ts):
         ips_str = ';'.join(ips)
-        self.file.write(f'"{domain}","{ips_str}","{method}","{datetime.now().isoformat()}"\n')
+        self._append(f'"{domain}","{ips_str}","{method}","{ts}"\n')
+
+def positive_int(value):
+    """argparse 类型: 正整数"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"必须为正整数: {value}")
+    return number
 
 def main():
     banner = """
@@ -273,21 +546,31 @@ def main():
     parser = argparse.ArgumentParser(description='子域名扫描工具')
     parser.add_argument('domain', help='要扫描的目标域名 (例如: example.com)')
     parser.add_argument('-w', '--wordlist', help='子域名字典文件路径')
-    parser.add_argument('-t', '--threads', type=int, default=50, help='线程数 (默认: 50)')
+    parser.add_argument('-t', '--threads', type=positive_int, default=50, help='并发基数, 实际同时检查的协程数为其20倍 (默认: 50, 即1000)')
     parser.add_argument('--timeout', type=float, default=5, help='超时时间 (默认: 5秒)')
     parser.add_argument('-o', '--output', help='输出文件路径')
     parser.add_argument('--methods', nargs='+', default=['dns', 'http'], 
                        choices=['dns', 'http', 'cert'], 
                        help='扫描方法 (默认: dns http)')
+    parser.add_argument('--resolvers', nargs='+', default=DEFAULT_NAMESERVERS,
+                       help='上游DNS服务器 (默认: ' + ' '.join(DEFAULT_NAMESERVERS) + ')')
+    parser.add_argument('--resolver', default='aiodns', choices=['aiodns', 'dnspython'],
+                       help='DNS解析实现 (默认: aiodns, dnspython 需另行安装)')
     
     args = parser.parse_args()
     
+    if args.resolver == 'dnspython' and dns is None:
+        print("[-] 错误: 未安装 dnspython, 请执行 pip install dnspython 或使用默认的 aiodns")
+        return
+    
     # 创建扫描器
     scanner = SubdomainScanner(
         domain=args.domain,
         threads=args.threads,
         timeout=args.timeout,
-        output=args.output
+        output=args.output,
+        nameservers=args.resolvers,
+        resolver=args.resolver
     )
     
     try:
@@ -309,11 +592,17 @@ def main():
         scanner.generate_report()
 
 if __name__ == "__main__":
-    # 禁用SSL警告
-    requests.packages.urllib3.disable_warnings()
-    
     # 检查是否在Windows上运行
     if os.name == 'nt':
         print("[*] 检测到Windows系统")
+        # pycares 依赖 select 事件循环, Windows 默认的 Proactor 不支持
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        # Linux/macOS 上优先使用 uvloop (libuv), 未安装时沿用默认事件循环
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
     
     main()